@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script: Add account transfer audit table
+Creates account_transfers and links csv_data rows to it via transfer_id
+
+Following SOLID principles:
+- Single Responsibility: This script handles only the transfer audit schema
+- Open/Closed: Records transferred earlier keep their account_context metadata
+"""
+
+import sqlite3
+import shutil
+from datetime import datetime
+
+
+class AddAccountTransfers:
+    """Handles adding the account_transfers table and csv_data.transfer_id column"""
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.backup_path = f"{db_path}.pre_transfers.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    
+    def backup_database(self) -> str:
+        """Create a backup before changing the schema"""
+        print(f"Creating backup: {self.backup_path}")
+        shutil.copy2(self.db_path, self.backup_path)
+        return self.backup_path
+    
+    def add_transfer_schema(self) -> bool:
+        """Create account_transfers and add the indexed csv_data.transfer_id column"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            print("Creating account_transfers table...")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS account_transfers (
+                    id INTEGER PRIMARY KEY,
+                    original_account_id INTEGER NOT NULL,
+                    original_account_name VARCHAR NOT NULL,
+                    original_platform_username VARCHAR,
+                    guest_account_id INTEGER NOT NULL,
+                    transferred_by INTEGER,
+                    transferred_at DATETIME NOT NULL,
+                    FOREIGN KEY (guest_account_id) REFERENCES accounts (id),
+                    FOREIGN KEY (transferred_by) REFERENCES users (id)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_account_transfers_id ON account_transfers(id)")
+            
+            cursor.execute("PRAGMA table_info(csv_data)")
+            column_names = [col[1] for col in cursor.fetchall()]
+            if "transfer_id" not in column_names:
+                print("Adding csv_data.transfer_id column...")
+                cursor.execute("ALTER TABLE csv_data ADD COLUMN transfer_id INTEGER REFERENCES account_transfers (id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_csv_data_transfer_id ON csv_data(transfer_id)")
+            
+            conn.commit()
+            print("✅ Transfer audit schema added")
+            return True
+        
+        except Exception as e:
+            print(f"❌ Error adding transfer audit schema: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def run_migration(self) -> bool:
+        """Execute the complete migration process"""
+        print("=== ADD ACCOUNT TRANSFER AUDIT ===")
+        print(f"Database: {self.db_path}")
+        
+        self.backup_database()
+        
+        if self.add_transfer_schema():
+            print(f"Backup saved as: {self.backup_path}")
+            return True
+        
+        print("❌ Migration failed!")
+        return False
+
+
+def main():
+    """Main execution"""
+    db_path = "ebay_manager.db"
+    
+    migration = AddAccountTransfers(db_path)
+    success = migration.run_migration()
+    
+    if success:
+        print("\n🎉 Database schema updated successfully!")
+    else:
+        print("\n💥 Migration failed! Check backup and try again.")
+    
+    return success
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 from app.database import engine, SessionLocal, Base
 from app.models import User, Account
@@ -6,8 +7,19 @@ from app.constants import GUEST_ACCOUNT_CONFIG
 
 
 def create_tables():
-    """Create all database tables"""
+    """Create all database tables and any indexes missing from existing tables"""
     Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            # create_all never adds columns to existing tables; those come from .temp migrations
+            missing_columns = [column.name for column in index.columns if column.name not in existing_columns]
+            if missing_columns:
+                print(f"Skipping index {index.name}: {table.name} has no column(s) {', '.join(missing_columns)}; "
+                      f"run the pending .temp migration script, then init_db again")
+                continue
+            index.create(bind=engine, checkfirst=True)
 
 
 def create_admin_user():
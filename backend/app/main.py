@@ -1,7 +1,8 @@
 from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.orm import Session, joinedload, contains_eager, defer
 from datetime import timedelta
 from typing import List, Dict, Any
 import logging
@@ -517,48 +518,18 @@ def upload_csv(
         )
     
     # Process each record with enhanced validation
+    new_records = []
     inserted_count = 0
     duplicate_count = 0
     validation_errors = []
+    upload_service = UniversalUploadService(db)
+    keyed_records = []
     
     for i, record in enumerate(records):
         try:
-            item_id = CSVProcessor.extract_item_id(record, data_type_enum)
+            keyed_records.append((CSVProcessor.extract_item_id(record, data_type_enum), record))
         except ValueError as e:
             validation_errors.append(f"Record {i + 1}: {str(e)}")
-            continue  # Skip invalid records
-        
-        # Check if record already exists
-        existing_record = db.query(CSVData).filter(
-            CSVData.account_id == account_id,
-            CSVData.data_type == data_type_enum.value,
-            CSVData.item_id == item_id
-        ).first()
-        
-        if existing_record:
-            duplicate_count += 1
-            continue
-        
-        # Create new CSV data record
-        csv_data = CSVData(
-            account_id=account_id,
-            data_type=data_type_enum.value,
-            csv_row=record,
-            item_id=item_id
-        )
-        db.add(csv_data)
-        
-        # If it's an order, create initial status
-        if data_type_enum == DataType.ORDER:
-            db.flush()  # Get the CSV data ID
-            order_status = OrderStatus(
-                csv_data_id=csv_data.id,
-                status="pending",
-                updated_by=current_user.id
-            )
-            db.add(order_status)
-        
-        inserted_count += 1
     
     # Handle validation errors
     if validation_errors:
@@ -568,6 +539,19 @@ def upload_csv(
                    (f" (and {len(validation_errors) - 3} more)" if len(validation_errors) > 3 else "")
         )
     
+    # Check only this upload's item IDs against what is already stored
+    existing_item_ids = upload_service.get_existing_item_ids(
+        account_id, data_type_enum, [item_id for item_id, _ in keyed_records]
+    )
+    for item_id, record in keyed_records:
+        if item_id in existing_item_ids:
+            duplicate_count += 1
+            continue
+        
+        new_records.append((item_id, record))
+        inserted_count += 1
+    
+    upload_service.insert_records(account_id, data_type_enum, new_records, current_user.id)
     db.commit()
     
     # PHASE 2.1: Enhanced response with detected username info  
@@ -586,6 +570,15 @@ def upload_csv(
     return response
 
 
+def _accessible_account_ids(user: User):
+    """Subquery of the active account ids a non-admin user can read.
+    
+    Kept in SQL so the account filter is resolved inside the data query
+    instead of loading the user's Account rows first.
+    """
+    return select(Account.id).where(Account.user_id == user.id, Account.is_active == True)
+
+
 @app.get("/api/v1/orders", response_model=List[OrderResponse])
 def get_orders(
     account_id: int = None,
@@ -593,25 +586,25 @@ def get_orders(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    from sqlalchemy.orm import joinedload
+    # account_context is not part of OrderResponse, so leave it unloaded
+    query = db.query(CSVData).filter(CSVData.data_type == "order").options(defer(CSVData.account_context))
     
-    query = db.query(CSVData).filter(CSVData.data_type == "order").options(joinedload(CSVData.order_status))
+    # Apply status filter in SQL; the join that filters also populates order_status
+    if status:
+        query = query.join(CSVData.order_status).filter(
+            OrderStatus.status == status
+        ).options(contains_eager(CSVData.order_status))
+    else:
+        query = query.options(joinedload(CSVData.order_status))
     
     # Filter by account access
     if current_user.role != "admin":
-        user_account_ids = [acc.id for acc in current_user.accounts if acc.is_active]
-        query = query.filter(CSVData.account_id.in_(user_account_ids))
+        query = query.filter(CSVData.account_id.in_(_accessible_account_ids(current_user)))
     
     if account_id:
         query = query.filter(CSVData.account_id == account_id)
     
-    orders = query.all()
-    
-    # Apply status filter if provided
-    if status:
-        orders = [order for order in orders if order.order_status and order.order_status.status == status]
-    
-    return orders
+    return query.all()
 
 
 @app.get("/api/v1/listings", response_model=List[ListingResponse])
@@ -620,12 +613,12 @@ def get_listings(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    query = db.query(CSVData).filter(CSVData.data_type == "listing")
+    # account_context is not part of ListingResponse, so leave it unloaded
+    query = db.query(CSVData).filter(CSVData.data_type == "listing").options(defer(CSVData.account_context))
     
     # Filter by account access
     if current_user.role != "admin":
-        user_account_ids = [acc.id for acc in current_user.accounts if acc.is_active]
-        query = query.filter(CSVData.account_id.in_(user_account_ids))
+        query = query.filter(CSVData.account_id.in_(_accessible_account_ids(current_user)))
     
     if account_id:
         query = query.filter(CSVData.account_id == account_id)
@@ -641,8 +634,8 @@ def update_order_status(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    # Get the order
-    order = db.query(CSVData).filter(
+    # Get the order's account owner; the order row itself is not needed
+    order = db.query(Account.user_id).select_from(CSVData).join(Account, CSVData.account_id == Account.id).filter(
         CSVData.id == order_id,
         CSVData.data_type == "order"
     ).first()
@@ -654,17 +647,19 @@ def update_order_status(
         )
     
     # Check permissions
-    if current_user.role != "admin" and order.account.user_id != current_user.id:
+    if current_user.role != "admin" and order.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this order"
         )
     
-    # Update or create order status
-    if order.order_status:
-        order.order_status.status = status_update.status.value
-        order.order_status.updated_by = current_user.id
-    else:
+    # Update the status in a single statement; create it if the order has none yet
+    result = db.execute(
+        update(OrderStatus)
+        .where(OrderStatus.csv_data_id == order_id)
+        .values(status=status_update.status.value, updated_by=current_user.id)
+    )
+    if result.rowcount == 0:
         order_status = OrderStatus(
             csv_data_id=order_id,
             status=status_update.status.value,
@@ -681,6 +676,20 @@ def get_current_user_info(current_user: User = Depends(get_current_active_user))
     return current_user
 
 
+_SEARCH_RESULT_LIMIT = 20
+
+
+def _csv_field_like(field: str, pattern: str):
+    """
+    Case-insensitive LIKE on one csv_row field, evaluated by SQLite.
+    
+    SQLite's lower() and LIKE only fold ASCII, so the field is lowered with the
+    unicode_lower() function registered in app.database; the pattern must
+    already be lowered with str.lower().
+    """
+    return func.unicode_lower(func.json_extract(CSVData.csv_row, f'$."{field}"')).like(pattern, escape="\\")
+
+
 @app.get("/api/v1/search")
 def global_search(
     q: str,
@@ -693,51 +702,44 @@ def global_search(
     if not q or len(q) < 2:
         return []
     
-    search_query = f"%{q.lower()}%"
+    search_query = "%{}%".format(
+        q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
     results = []
     
-    # Search in orders
-    order_rows = db.query(CSVData).filter(
-        CSVData.data_type == "order"
-    ).all()
+    # Search in orders: Order #, Item #, Customer, or Item name
+    order_rows = db.query(CSVData.item_id, CSVData.csv_row).filter(
+        CSVData.data_type == "order",
+        or_(*[_csv_field_like(field, search_query) for field in ("Order #", "Item #", "Customer", "Item")])
+    ).limit(_SEARCH_RESULT_LIMIT).all()
     
     for order in order_rows:
         csv_data = order.csv_row
-        # Search in Order #, Item #, Customer, or Item name
-        if (q.lower() in csv_data.get("Order #", "").lower() or
-            q.lower() in csv_data.get("Item #", "").lower() or  
-            q.lower() in csv_data.get("Customer", "").lower() or
-            q.lower() in csv_data.get("Item", "").lower()):
-            
-            results.append({
-                "type": "order",
-                "id": csv_data.get("Order #", order.item_id),
-                "title": f"Order {csv_data.get('Order #', 'N/A')}",
-                "subtitle": f"{csv_data.get('Customer', 'N/A')} - {csv_data.get('Item', 'N/A')}",
-                "status": csv_data.get("Status", "pending")
-            })
+        results.append({
+            "type": "order",
+            "id": csv_data.get("Order #", order.item_id),
+            "title": f"Order {csv_data.get('Order #', 'N/A')}",
+            "subtitle": f"{csv_data.get('Customer', 'N/A')} - {csv_data.get('Item', 'N/A')}",
+            "status": csv_data.get("Status", "pending")
+        })
     
-    # Search in listings
-    listing_rows = db.query(CSVData).filter(
-        CSVData.data_type == "listing"
-    ).all()
+    # Search in listings: Item # or Title
+    listing_rows = db.query(CSVData.item_id, CSVData.csv_row).filter(
+        CSVData.data_type == "listing",
+        or_(*[_csv_field_like(field, search_query) for field in ("Item #", "Title")])
+    ).limit(_SEARCH_RESULT_LIMIT - len(results)).all()
     
     for listing in listing_rows:
         csv_data = listing.csv_row
-        # Search in Item # or Title
-        if (q.lower() in csv_data.get("Item #", "").lower() or
-            q.lower() in csv_data.get("Title", "").lower()):
-            
-            results.append({
-                "type": "listing",
-                "id": csv_data.get("Item #", listing.item_id),
-                "title": csv_data.get("Title", "N/A"),
-                "subtitle": f"Item #{csv_data.get('Item #', 'N/A')} - {csv_data.get('Price', '$0')}",
-                "status": csv_data.get("Status", "active")
-            })
+        results.append({
+            "type": "listing",
+            "id": csv_data.get("Item #", listing.item_id),
+            "title": csv_data.get("Title", "N/A"),
+            "subtitle": f"Item #{csv_data.get('Item #', 'N/A')} - {csv_data.get('Price', '$0')}",
+            "status": csv_data.get("Status", "active")
+        })
     
-    # Limit results to 20 items
-    return results[:20]
+    return results
 
 
 # =============================================================================
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, JSON, Date, Numeric
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, JSON, Date, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -58,9 +58,16 @@ class CSVData(Base):
     account_context = Column(Text, default='{}')  # JSON as TEXT for SQLite
     processed_at = Column(DateTime(timezone=True))
     processing_status = Column(String, default="pending")  # pending, processing, completed, error
+    transfer_id = Column(Integer, ForeignKey("account_transfers.id"), index=True)  # Set when moved to GUEST account
 
     account = relationship("Account", back_populates="csv_data")
     order_status = relationship("OrderStatus", back_populates="csv_data", uselist=False)
+    transfer = relationship("AccountTransfer", back_populates="csv_data")
+
+    # Covers per-account lookups and counts by data type, and upload duplicate checks by item_id
+    __table_args__ = (
+        Index("ix_csv_data_account_id_data_type_item_id", "account_id", "data_type", "item_id"),
+    )
 
 
 class OrderStatus(Base):
@@ -75,6 +82,11 @@ class OrderStatus(Base):
     csv_data = relationship("CSVData", back_populates="order_status")
     updated_by_user = relationship("User")
 
+    # Covers the order -> status join and filtering orders by status
+    __table_args__ = (
+        Index("ix_order_status_csv_data_id_status", "csv_data_id", "status"),
+    )
+
 
 # =============================================================================
 # Sprint 7: Enhanced Account Management Models
@@ -86,7 +98,7 @@ class UserAccountPermission(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
     permission_level = Column(String, default="view", nullable=False)  # view, edit, admin
     granted_by = Column(Integer, ForeignKey("users.id"))
     granted_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -123,7 +135,7 @@ class AccountSettings(Base):
     __tablename__ = "account_settings"
     
     id = Column(Integer, primary_key=True, index=True)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
     setting_key = Column(String, nullable=False)
     setting_value = Column(Text)
     setting_type = Column(String, default="string")  # string, number, boolean, json
@@ -132,4 +144,21 @@ class AccountSettings(Base):
     
     # Relationships
     account = relationship("Account", back_populates="settings_records")
-    updated_by_user = relationship("User")
\ No newline at end of file
+    updated_by_user = relationship("User")
+
+
+class AccountTransfer(Base):
+    """Audit record of a deleted account whose data was transferred to the GUEST account"""
+    __tablename__ = "account_transfers"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    original_account_id = Column(Integer, nullable=False)  # No FK: the original account is deleted
+    original_account_name = Column(String, nullable=False)
+    original_platform_username = Column(String)
+    guest_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    transferred_by = Column(Integer, ForeignKey("users.id"))
+    transferred_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # Relationships
+    csv_data = relationship("CSVData", back_populates="transfer")
+    transferred_by_user = relationship("User")
@@ -5,7 +5,8 @@ Handles business logic for eBay account management following SOLID principles
 
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, delete
+from collections import Counter
 from datetime import datetime, date
 import json
 import logging
@@ -368,39 +369,34 @@ class AccountService:
         }
         
         # Delete related data in proper order (respecting foreign key constraints)
+        account_csv_ids = select(CSVData.id).where(CSVData.account_id == account.id)
         
         # 1. Delete order statuses (references csv_data)
-        order_statuses = self.db.query(OrderStatus).join(CSVData).filter(
-            CSVData.account_id == account.id
-        ).all()
-        for order_status in order_statuses:
-            self.db.delete(order_status)
-        deletion_summary["deleted_order_statuses"] = len(order_statuses)
-        
-        # 2. Delete CSV data (orders and listings)
-        csv_data = self.db.query(CSVData).filter(CSVData.account_id == account.id).all()
-        for csv_record in csv_data:
-            if csv_record.data_type == "order":
-                deletion_summary["deleted_orders"] += 1
-            elif csv_record.data_type == "listing":
-                deletion_summary["deleted_listings"] += 1
-            self.db.delete(csv_record)
+        deletion_summary["deleted_order_statuses"] = self.db.query(OrderStatus).filter(
+            OrderStatus.csv_data_id.in_(account_csv_ids)
+        ).delete(synchronize_session="fetch")
+        
+        # 2. Delete CSV data (orders and listings), counting deleted rows per data type
+        deleted_types = Counter(
+            data_type for (data_type,) in self.db.execute(
+                delete(CSVData)
+                .where(CSVData.account_id == account.id)
+                .returning(CSVData.data_type)
+                .execution_options(synchronize_session="fetch")
+            )
+        )
+        deletion_summary["deleted_orders"] = deleted_types.get("order", 0)
+        deletion_summary["deleted_listings"] = deleted_types.get("listing", 0)
         
         # 3. Delete account permissions
-        permissions = self.db.query(UserAccountPermission).filter(
+        deletion_summary["deleted_permissions"] = self.db.query(UserAccountPermission).filter(
             UserAccountPermission.account_id == account.id
-        ).all()
-        for permission in permissions:
-            self.db.delete(permission)
-        deletion_summary["deleted_permissions"] = len(permissions)
+        ).delete(synchronize_session="fetch")
         
         # 4. Delete account settings
-        settings = self.db.query(AccountSettings).filter(
+        deletion_summary["deleted_settings"] = self.db.query(AccountSettings).filter(
             AccountSettings.account_id == account.id
-        ).all()
-        for setting in settings:
-            self.db.delete(setting)
-        deletion_summary["deleted_settings"] = len(settings)
+        ).delete(synchronize_session="fetch")
         
         # 5. Finally delete the account itself
         self.db.delete(account)
@@ -42,7 +42,7 @@ class EnhancedUploadService:
         try:
             # Validate file size (YAGNI: Only check what we actually need)
             max_size = 50 * 1024 * 1024  # 50MB - realistic for CSV
-            if len(content.encode('utf-8')) > max_size:
+            if self._exceeds_size(content, max_size):
                 error = SimpleErrorHandler.create_error('FILE_TOO_LARGE')
                 progress_tracker.complete_upload(upload_id, False, error.message)
                 return SimpleErrorHandler.format_error_response(error)
@@ -88,6 +88,18 @@ class EnhancedUploadService:
             progress_tracker.complete_upload(upload_id, False, error.message)
             return SimpleErrorHandler.format_error_response(error)
     
+    @staticmethod
+    def _exceeds_size(content: str, max_size: int) -> bool:
+        """
+        Check UTF-8 size without encoding when the character count decides it
+        Each character encodes to 1-4 bytes, so only the ambiguous range is encoded
+        """
+        if len(content) > max_size:
+            return True
+        if len(content) * 4 <= max_size:
+            return False
+        return len(content.encode('utf-8')) > max_size
+    
     def get_upload_progress(self, upload_id: str) -> Dict[str, Any]:
         """Get upload progress - Single Responsibility"""
         progress = progress_tracker.get_progress(upload_id)
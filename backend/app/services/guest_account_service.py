@@ -4,17 +4,26 @@ Guest Account Service - Handles data preservation during account deletions
 
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-import json
+from sqlalchemy import or_, func, case, update, select, union
+from sqlalchemy.exc import SQLAlchemyError
 import logging
+from collections import Counter
 from datetime import datetime
 
-from app.models import Account, CSVData, OrderStatus, UserAccountPermission, AccountSettings
-from app.constants import GUEST_ACCOUNT_CONFIG, DeletionAction
+from app.models import Account, CSVData, OrderStatus, UserAccountPermission, AccountSettings, AccountTransfer
+from app.constants import GUEST_ACCOUNT_CONFIG, DeletionAction, AccountType
 from app.schemas import PermissionLevel
 
 logger = logging.getLogger(__name__)
 
+_GUEST_USERNAME = GUEST_ACCOUNT_CONFIG["PLATFORM_USERNAME"]
+_GUEST_USER_ID = GUEST_ACCOUNT_CONFIG["USER_ID"]
+_GUEST_NAME = GUEST_ACCOUNT_CONFIG["NAME"]
+_GUEST_TYPE = GUEST_ACCOUNT_CONFIG["ACCOUNT_TYPE"]
+_GUEST_CONNECTION_STATUS = GUEST_ACCOUNT_CONFIG["CONNECTION_STATUS"]
+_GUEST_SETTINGS = '{"is_guest_account": true, "is_deletable": false, "is_editable": false}'
+_GUEST_PERFORMANCE_METRICS = '{"description": "System account for preserving data from deleted accounts"}'
+
 
 class GuestAccountService:
     """
@@ -27,6 +36,7 @@ class GuestAccountService:
     
     def __init__(self, db: Session):
         self.db = db
+        self._guest_account_id: Optional[int] = None
     
     def get_guest_account(self) -> Optional[Account]:
         """
@@ -36,17 +46,35 @@ class GuestAccountService:
         Returns:
             GUEST account instance or None if creation failed
         """
+        if self._guest_account_id is not None:
+            guest_account = self.db.get(Account, self._guest_account_id)
+            if guest_account:
+                return guest_account
+            self._guest_account_id = None
+        
         guest_account = self.db.query(Account).filter(
-            Account.platform_username == GUEST_ACCOUNT_CONFIG["PLATFORM_USERNAME"]
+            Account.platform_username == _GUEST_USERNAME
         ).first()
         
         if guest_account:
+            self._guest_account_id = guest_account.id
             return guest_account
             
         # GUEST account not found, attempt to create it (lazy initialization)
         logger.warning("GUEST account not found, attempting to create it automatically...")
         return self._create_guest_account_lazy()
     
+    def get_guest_account_id(self) -> Optional[int]:
+        """
+        Get the GUEST account ID, cached for the lifetime of this service
+        
+        Returns:
+            GUEST account ID or None if the account is unavailable
+        """
+        if self._guest_account_id is None:
+            self.get_guest_account()
+        return self._guest_account_id
+    
     def _create_guest_account_lazy(self) -> Optional[Account]:
         """
         Lazy creation of GUEST account when it doesn't exist
@@ -58,40 +86,39 @@ class GuestAccountService:
         try:
             # Verify admin user exists (required for GUEST account)
             from app.models import User
-            admin_user = self.db.query(User).filter(User.id == GUEST_ACCOUNT_CONFIG["USER_ID"]).first()
+            admin_user = self.db.query(User).filter(User.id == _GUEST_USER_ID).first()
             
             if not admin_user:
-                logger.error(f"Admin user (ID: {GUEST_ACCOUNT_CONFIG['USER_ID']}) not found. Cannot create GUEST account.")
+                logger.error(f"Admin user (ID: {_GUEST_USER_ID}) not found. Cannot create GUEST account.")
                 return None
                 
             # Create GUEST account
             guest_account = Account(
-                user_id=GUEST_ACCOUNT_CONFIG["USER_ID"],
-                platform_username=GUEST_ACCOUNT_CONFIG["PLATFORM_USERNAME"],
-                name=GUEST_ACCOUNT_CONFIG["NAME"],
+                user_id=_GUEST_USER_ID,
+                platform_username=_GUEST_USERNAME,
+                name=_GUEST_NAME,
                 is_active=True,  # Always active for system account
-                account_type=GUEST_ACCOUNT_CONFIG["ACCOUNT_TYPE"],
-                connection_status=GUEST_ACCOUNT_CONFIG["CONNECTION_STATUS"],
+                account_type=_GUEST_TYPE,
+                connection_status=_GUEST_CONNECTION_STATUS,
                 data_processing_enabled=False,  # GUEST account doesn't process new data
-                settings='{"is_guest_account": true, "is_deletable": false, "is_editable": false}',
-                performance_metrics='{"description": "System account for preserving data from deleted accounts"}'
+                settings=_GUEST_SETTINGS,
+                performance_metrics=_GUEST_PERFORMANCE_METRICS
             )
             
-            self.db.add(guest_account)
+            # SAVEPOINT: a failed insert rolls back only itself, not the caller's transaction
+            with self.db.begin_nested():
+                self.db.add(guest_account)
             self.db.commit()
             self.db.refresh(guest_account)
+            self._guest_account_id = guest_account.id
             
             logger.info(f"✅ GUEST account created successfully via lazy initialization (ID: {guest_account.id})")
             logger.info(f"📋 GUEST account: {guest_account.name} - {guest_account.platform_username}")
             
             return guest_account
             
-        except Exception as e:
+        except SQLAlchemyError as e:
             logger.error(f"❌ Failed to create GUEST account lazily: {e}")
-            try:
-                self.db.rollback()
-            except:
-                pass
             return None
 
     def is_guest_account(self, account: Account) -> bool:
@@ -104,8 +131,8 @@ class GuestAccountService:
         Returns:
             True if account is GUEST account
         """
-        return (account.platform_username == GUEST_ACCOUNT_CONFIG["PLATFORM_USERNAME"] or
-                account.account_type == "system")
+        return (account.platform_username == _GUEST_USERNAME or
+                account.account_type == AccountType.SYSTEM)
     
     def transfer_account_data(
         self, 
@@ -125,22 +152,28 @@ class GuestAccountService:
         Raises:
             ValueError: If GUEST account not found or transfer fails
         """
-        guest_account = self.get_guest_account()
-        if not guest_account:
+        if self.is_guest_account(source_account):
+            raise ValueError("Cannot transfer data from GUEST account to itself")
+        
+        # Use the GUEST account ID only to prevent SQLAlchemy session issues
+        guest_account_id = self.get_guest_account_id()
+        if guest_account_id is None:
             raise ValueError("GUEST account not available for data transfer")
         
-        if not guest_account.id:
-            raise ValueError("GUEST account has invalid ID")
+        if source_account.id == guest_account_id:
+            raise ValueError("Cannot transfer data from GUEST account to itself")
             
         # Additional validation
-        if not isinstance(guest_account.id, int) or guest_account.id <= 0:
-            raise ValueError(f"GUEST account ID is invalid: {guest_account.id}")
+        if not isinstance(guest_account_id, int) or guest_account_id <= 0:
+            raise ValueError(f"GUEST account ID is invalid: {guest_account_id}")
         
-        # Store GUEST account ID as variable to prevent SQLAlchemy session issues
-        guest_account_id = guest_account.id
-        logger.info(f"Using GUEST account ID: {guest_account_id} (type: {type(guest_account_id)})")
+        logger.info(
+            "Starting data transfer from account %s (ID: %s) to GUEST (ID: %s)",
+            source_account.name, source_account.id, guest_account_id
+        )
         
-        logger.info(f"Starting data transfer from account {source_account.name} (ID: {source_account.id}) to GUEST (ID: {guest_account_id})")
+        transferred_at = datetime.now()
+        transfer_timestamp = transferred_at.isoformat()
         
         transfer_summary = {
             "source_account_id": source_account.id,
@@ -155,136 +188,67 @@ class GuestAccountService:
             "errors": []
         }
         
+        # Nothing to move: return before writing anything, leaving the caller's
+        # session transaction untouched
+        if not self._count_csv_by_type(source_account.id):
+            logger.warning("No CSV records found for source account %s", source_account.id)
+            transfer_summary["transfer_timestamp"] = transfer_timestamp
+            return transfer_summary
+        
         try:
-            # 1. Transfer CSV data (orders and listings) to GUEST account
-            csv_data_records = self.db.query(CSVData).filter(
-                CSVData.account_id == source_account.id
-            ).all()
+            # Record the original account once; transferred records reference it
+            account_transfer = AccountTransfer(
+                original_account_id=source_account.id,
+                original_account_name=source_account.name,
+                original_platform_username=source_account.platform_username,
+                guest_account_id=guest_account_id,
+                transferred_by=target_user_id,
+                transferred_at=transferred_at
+            )
+            self.db.add(account_transfer)
+            self.db.flush()
             
-            logger.info(f"Found {len(csv_data_records)} CSV records to transfer")
+            # Order statuses follow their CSV data; count them while still on the source account
+            order_status_count = self.db.query(func.count(OrderStatus.id)).join(CSVData).filter(
+                CSVData.account_id == source_account.id
+            ).scalar()
             
-            # Early return if no data to transfer
-            if not csv_data_records:
-                logger.warning(f"No CSV records found for source account {source_account.id}")
-                transfer_summary["transfer_timestamp"] = datetime.now().isoformat()
-                return transfer_summary
+            # 1. Transfer CSV data (orders and listings) to GUEST account in a single UPDATE
+            type_counts = self._bulk_transfer_csv(source_account.id, guest_account_id, account_transfer.id)
+            transferred_count = sum(type_counts.values())
             
-            for i, csv_record in enumerate(csv_data_records, 1):
-                logger.info(f"Processing CSV record {i}/{len(csv_data_records)}: ID={csv_record.id}, current account_id={csv_record.account_id}")
-                
-                # Validate record before transfer
-                if csv_record.account_id != source_account.id:
-                    logger.warning(f"CSV record {csv_record.id} has unexpected account_id {csv_record.account_id}, expected {source_account.id}")
-                    continue
-                    
-                # Add metadata about original account
-                original_metadata = {
-                    "original_account_id": source_account.id,
-                    "original_account_name": source_account.name,
-                    "original_platform_username": source_account.platform_username,
-                    "transferred_at": datetime.now().isoformat(),
-                    "transferred_by": target_user_id
-                }
-                
-                # Update account context with original account info
-                try:
-                    existing_context = json.loads(csv_record.account_context) if csv_record.account_context else {}
-                except (json.JSONDecodeError, TypeError) as e:
-                    logger.warning(f"Invalid JSON in account_context for record {csv_record.id}: {e}")
-                    existing_context = {}
-                
-                existing_context.update(original_metadata)
-                new_context = json.dumps(existing_context)
-                
-                # Log the transformation
-                logger.debug(f"Updating context for record {csv_record.id}: {new_context}")
-                csv_record.account_context = new_context
-                
-                # Transfer to GUEST account - use stored ID to prevent SQLAlchemy session issues
-                old_account_id = csv_record.account_id
-                csv_record.account_id = guest_account_id
-                
-                logger.info(f"✅ Transferred CSV record {csv_record.id}: {old_account_id} → {guest_account_id}, data_type={csv_record.data_type}")
-                
-                if csv_record.data_type == "order":
-                    transfer_summary["transferred_orders"] += 1
-                elif csv_record.data_type == "listing":
-                    transfer_summary["transferred_listings"] += 1
+            transfer_summary["transferred_orders"] = type_counts.get("order", 0)
+            transfer_summary["transferred_listings"] = type_counts.get("listing", 0)
             
-            # 2. Update order statuses (they should automatically follow CSV data)
-            order_statuses = self.db.query(OrderStatus).join(CSVData).filter(
-                CSVData.account_id == guest_account_id  # Now pointing to guest account
-            ).all()
-            transfer_summary["transferred_order_statuses"] = len(order_statuses)
+            # 2. Order statuses automatically follow CSV data
+            transfer_summary["transferred_order_statuses"] = order_status_count
             
-            # 3. Skip permissions and settings (don't transfer to GUEST account)
-            permissions = self.db.query(UserAccountPermission).filter(
+            # 3. Delete permissions and settings instead of moving them (not needed for GUEST account)
+            transfer_summary["skipped_permissions"] = self.db.query(UserAccountPermission).filter(
                 UserAccountPermission.account_id == source_account.id
-            ).all()
-            transfer_summary["skipped_permissions"] = len(permissions)
+            ).delete(synchronize_session="fetch")
             
-            settings = self.db.query(AccountSettings).filter(
+            transfer_summary["skipped_settings"] = self.db.query(AccountSettings).filter(
                 AccountSettings.account_id == source_account.id
-            ).all()
-            transfer_summary["skipped_settings"] = len(settings)
-            
-            # 4. Delete permissions and settings (not needed for GUEST account)
-            for permission in permissions:
-                self.db.delete(permission)
-            for setting in settings:
-                self.db.delete(setting)
-            
-            # 5. Flush changes to database before validation (but don't commit yet)
-            self.db.flush()
-            logger.info("Database changes flushed before validation")
+            ).delete(synchronize_session="fetch")
             
-            # 6. Validate all CSV records have been properly transferred before committing
-            validation_records = self.db.query(CSVData).filter(
-                CSVData.account_id == guest_account_id
-            ).all()
-            
-            # Count records that were transferred from this specific source account
-            transferred_count = 0
-            for record in validation_records:
-                try:
-                    context = json.loads(record.account_context or '{}')
-                    if context.get('original_account_id') == source_account.id:
-                        transferred_count += 1
-                        logger.debug(f"Validated transferred record {record.id} from account {source_account.id}")
-                except (json.JSONDecodeError, TypeError) as e:
-                    logger.warning(f"Invalid JSON in account_context for record {record.id}: {e}")
-                    continue
-            
-            logger.info(f"Validation: {transferred_count} records transferred to GUEST account (expected: {len(csv_data_records)})")
-            
-            if transferred_count != len(csv_data_records):
-                # Enhanced error reporting
-                logger.error(f"Transfer validation failed:")
-                logger.error(f"  Expected: {len(csv_data_records)} records")
-                logger.error(f"  Found: {transferred_count} records")
-                logger.error(f"  Source account ID: {source_account.id}")
-                logger.error(f"  GUEST account ID: {guest_account_id}")
-                
-                # Log all validation records for debugging
-                for i, record in enumerate(validation_records):
-                    context = json.loads(record.account_context or '{}') if record.account_context else {}
-                    logger.error(f"  Validation record {i+1}: ID={record.id}, original_account_id={context.get('original_account_id', 'None')}")
-                
-                raise ValueError(f"Transfer validation failed: expected {len(csv_data_records)} records, found {transferred_count}")
-            
-            # 7. Finally delete the source account and commit all changes
+            # 4. Finally delete the source account and commit all changes
             self.db.delete(source_account)
             
             # Commit the entire transaction
             self.db.commit()
-            logger.info(f"Transaction committed successfully - account {source_account.id} deleted and data transferred")
             
-            transfer_summary["transfer_timestamp"] = datetime.now().isoformat()
+            transfer_summary["transfer_timestamp"] = transfer_timestamp
             
-            logger.info(f"Data transfer completed successfully:")
-            logger.info(f"  Orders transferred: {transfer_summary['transferred_orders']}")
-            logger.info(f"  Listings transferred: {transfer_summary['transferred_listings']}")
-            logger.info(f"  Order statuses updated: {transfer_summary['transferred_order_statuses']}")
+            logger.info(
+                "Transferred %d CSV records (%d orders, %d listings, %d order statuses) from account %s to GUEST %s",
+                transferred_count,
+                transfer_summary["transferred_orders"],
+                transfer_summary["transferred_listings"],
+                transfer_summary["transferred_order_statuses"],
+                transfer_summary["source_account_id"],
+                guest_account_id
+            )
             
             return transfer_summary
             
@@ -302,6 +266,49 @@ class GuestAccountService:
             
             raise ValueError(f"Data transfer failed: {str(e)}")
     
+    def _count_csv_by_type(self, account_id: int) -> Dict[str, int]:
+        """
+        Count an account's CSV records per data type in one grouped query
+        
+        Args:
+            account_id: Account to count records for
+            
+        Returns:
+            Mapping of data_type to record count
+        """
+        return dict(
+            self.db.query(CSVData.data_type, func.count(CSVData.id))
+            .filter(CSVData.account_id == account_id)
+            .group_by(CSVData.data_type)
+            .all()
+        )
+    
+    def _bulk_transfer_csv(
+        self,
+        source_account_id: int,
+        guest_account_id: int,
+        transfer_id: int
+    ) -> Dict[str, int]:
+        """
+        Move all CSV records of an account to GUEST with one UPDATE statement
+        
+        Args:
+            source_account_id: Account whose records are transferred
+            guest_account_id: GUEST account receiving the records
+            transfer_id: AccountTransfer audit record the records are linked to
+            
+        Returns:
+            Mapping of data_type to number of transferred records
+        """
+        result = self.db.execute(
+            update(CSVData)
+            .where(CSVData.account_id == source_account_id)
+            .values(account_id=guest_account_id, transfer_id=transfer_id)
+            .returning(CSVData.data_type)
+            .execution_options(synchronize_session="fetch")
+        )
+        return dict(Counter(data_type for (data_type,) in result))
+    
     def get_guest_account_summary(self) -> Dict[str, Any]:
         """
         Get summary of data stored in GUEST account
@@ -314,33 +321,32 @@ class GuestAccountService:
             return {"error": "GUEST account not found"}
         
         # Count data in GUEST account
-        orders_count = self.db.query(CSVData).filter(
-            and_(
-                CSVData.account_id == guest_account.id,
-                CSVData.data_type == "order"
-            )
-        ).count()
+        type_counts = self._count_csv_by_type(guest_account.id)
+        orders_count = type_counts.get("order", 0)
+        listings_count = type_counts.get("listing", 0)
         
-        listings_count = self.db.query(CSVData).filter(
-            and_(
-                CSVData.account_id == guest_account.id,
-                CSVData.data_type == "listing"
-            )
-        ).count()
+        # Get original account names from transfer records
+        transferred_names = select(AccountTransfer.original_account_name).join(
+            CSVData, CSVData.transfer_id == AccountTransfer.id
+        ).where(CSVData.account_id == guest_account.id)
         
-        # Get original account information from transferred data
-        transferred_data = self.db.query(CSVData).filter(
-            CSVData.account_id == guest_account.id
-        ).all()
+        # Records transferred before AccountTransfer existed keep the name in account_context;
+        # only contexts containing the key are parsed
+        legacy_names = select(
+            case(
+                (func.json_valid(CSVData.account_context) == 1,
+                 func.json_extract(CSVData.account_context, "$.original_account_name"))
+            )
+        ).where(
+            CSVData.account_id == guest_account.id,
+            CSVData.transfer_id.is_(None),
+            CSVData.account_context.contains('"original_account_name"', autoescape=True)
+        )
         
-        original_accounts = set()
-        for record in transferred_data:
-            try:
-                context = json.loads(record.account_context) if record.account_context else {}
-                if "original_account_name" in context:
-                    original_accounts.add(context["original_account_name"])
-            except (json.JSONDecodeError, TypeError):
-                continue
+        original_accounts = [
+            name for name in self.db.execute(union(transferred_names, legacy_names)).scalars()
+            if name is not None
+        ]
         
         return {
             "guest_account_id": guest_account.id,
@@ -349,7 +355,7 @@ class GuestAccountService:
             "total_listings": listings_count,
             "total_records": orders_count + listings_count,
             "original_accounts_count": len(original_accounts),
-            "original_accounts": list(original_accounts)
+            "original_accounts": original_accounts
         }
     
     def validate_account_deletion(self, account: Account) -> Dict[str, Any]:
@@ -369,28 +375,25 @@ class GuestAccountService:
                 "data_impact": None
             }
         
-        # Count data that would be affected
-        orders_count = self.db.query(CSVData).filter(
-            and_(
-                CSVData.account_id == account.id,
-                CSVData.data_type == "order"
+        # Count data that would be affected in a single round-trip
+        orders_count, listings_count, permissions_count, settings_count = self.db.execute(
+            select(
+                select(func.count(CSVData.id)).where(
+                    CSVData.account_id == account.id,
+                    CSVData.data_type == "order"
+                ).scalar_subquery(),
+                select(func.count(CSVData.id)).where(
+                    CSVData.account_id == account.id,
+                    CSVData.data_type == "listing"
+                ).scalar_subquery(),
+                select(func.count(UserAccountPermission.id)).where(
+                    UserAccountPermission.account_id == account.id
+                ).scalar_subquery(),
+                select(func.count(AccountSettings.id)).where(
+                    AccountSettings.account_id == account.id
+                ).scalar_subquery()
             )
-        ).count()
-        
-        listings_count = self.db.query(CSVData).filter(
-            and_(
-                CSVData.account_id == account.id,
-                CSVData.data_type == "listing"
-            )
-        ).count()
-        
-        permissions_count = self.db.query(UserAccountPermission).filter(
-            UserAccountPermission.account_id == account.id
-        ).count()
-        
-        settings_count = self.db.query(AccountSettings).filter(
-            AccountSettings.account_id == account.id
-        ).count()
+        ).one()
         
         return {
             "can_delete": True,
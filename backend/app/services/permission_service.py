@@ -330,8 +330,8 @@ class PermissionService:
         Returns:
             True if user has required permission
         """
-        # Get user to check admin status
-        user = self.db.query(User).filter(User.id == user_id).first()
+        # Only the role is needed to check admin status
+        user = self.db.query(User.role).filter(User.id == user_id).first()
         if not user:
             return False
         
@@ -3,7 +3,8 @@ Universal Upload Service - SOLID Compliant
 Extracts existing CSV upload logic from main.py
 Single Responsibility: Handle CSV upload processing only
 """
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Set, Tuple
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
 import logging
@@ -15,6 +16,9 @@ from app.interfaces.upload_strategy import UploadResult, UploadContext, UploadSo
 
 logger = logging.getLogger(__name__)
 
+# Item IDs per duplicate-check query, well under SQLite's bound-parameter limit
+_ITEM_ID_BATCH_SIZE = 500
+
 
 class UniversalUploadService:
     """
@@ -94,48 +98,17 @@ class UniversalUploadService:
                 )
             
             # Process each record (from existing main.py logic with enhanced validation)
+            new_records = []
             inserted_count = 0
             duplicate_count = 0
             validation_errors = []
+            keyed_records = []
             
             for i, record in enumerate(records):
                 try:
-                    item_id = CSVProcessor.extract_item_id(record, data_type_enum)
+                    keyed_records.append((CSVProcessor.extract_item_id(record, data_type_enum), record))
                 except ValueError as e:
                     validation_errors.append(f"Record {i + 1}: {str(e)}")
-                    continue  # Skip invalid records
-                
-                # Check if record already exists
-                existing_record = self.db.query(CSVData).filter(
-                    CSVData.account_id == context.account_id,
-                    CSVData.data_type == data_type_enum.value,
-                    CSVData.item_id == item_id
-                ).first()
-                
-                if existing_record:
-                    duplicate_count += 1
-                    continue
-                
-                # Create new CSV data record
-                csv_data = CSVData(
-                    account_id=context.account_id,
-                    data_type=data_type_enum.value,
-                    csv_row=record,
-                    item_id=item_id
-                )
-                self.db.add(csv_data)
-                
-                # If it's an order, create initial status
-                if data_type_enum == DataType.ORDER:
-                    self.db.flush()  # Get the CSV data ID
-                    order_status = OrderStatus(
-                        csv_data_id=csv_data.id,
-                        status="pending",
-                        updated_by=context.user_id
-                    )
-                    self.db.add(order_status)
-                
-                inserted_count += 1
             
             # Return validation errors if any records were invalid
             if validation_errors:
@@ -145,6 +118,19 @@ class UniversalUploadService:
                     errors=validation_errors
                 )
             
+            # Check only this upload's item IDs against what is already stored
+            existing_item_ids = self.get_existing_item_ids(
+                context.account_id, data_type_enum, [item_id for item_id, _ in keyed_records]
+            )
+            for item_id, record in keyed_records:
+                if item_id in existing_item_ids:
+                    duplicate_count += 1
+                    continue
+                
+                new_records.append((item_id, record))
+                inserted_count += 1
+            
+            self.insert_records(context.account_id, data_type_enum, new_records, context.user_id)
             self.db.commit()
             
             # Build success response (from existing main.py logic)
@@ -167,4 +153,65 @@ class UniversalUploadService:
                 success=False,
                 message=f"Upload failed: {str(e)}",
                 errors=[str(e)]
-            )
\ No newline at end of file
+            )
+    
+    def get_existing_item_ids(self, account_id: int, data_type: DataType, item_ids: List[str]) -> Set[str]:
+        """
+        Get which of the uploaded item IDs are already stored for an account,
+        so an upload can skip duplicates with a few batched queries instead of
+        one SELECT per record.
+        
+        Args:
+            account_id: Account being uploaded to
+            data_type: Type of the uploaded records
+            item_ids: Item IDs of the uploaded records
+            
+        Returns:
+            Set of the given item IDs that already exist
+        """
+        existing_item_ids = set()
+        for start in range(0, len(item_ids), _ITEM_ID_BATCH_SIZE):
+            rows = self.db.query(CSVData.item_id).filter(
+                CSVData.account_id == account_id,
+                CSVData.data_type == data_type.value,
+                CSVData.item_id.in_(item_ids[start:start + _ITEM_ID_BATCH_SIZE])
+            ).all()
+            existing_item_ids.update(item_id for item_id, in rows)
+        return existing_item_ids
+    
+    def insert_records(
+        self,
+        account_id: int,
+        data_type: DataType,
+        records: List[Tuple[str, Dict[str, Any]]],
+        updated_by: int
+    ) -> None:
+        """
+        Insert new CSV records with batched statements instead of one INSERT
+        (and, for orders, one flush) per record.
+        
+        Args:
+            account_id: Account the records belong to
+            data_type: Type of the records
+            records: (item_id, csv_row) pairs that are not stored yet
+            updated_by: User recorded on the initial order statuses
+        """
+        if not records:
+            return
+        
+        csv_data_ids = self.db.scalars(insert(CSVData).returning(CSVData.id), [
+            {
+                "account_id": account_id,
+                "data_type": data_type.value,
+                "csv_row": record,
+                "item_id": item_id
+            }
+            for item_id, record in records
+        ]).all()
+        
+        # Orders start as pending; every status is the same, so RETURNING order does not matter
+        if data_type == DataType.ORDER:
+            self.db.execute(insert(OrderStatus), [
+                {"csv_data_id": csv_data_id, "status": "pending", "updated_by": updated_by}
+                for csv_data_id in csv_data_ids
+            ])
\ No newline at end of file
@@ -226,6 +226,49 @@ def test_get_orders_with_filters(test_client):
     assert isinstance(response.json(), list)
 
 
+def test_get_orders_status_filter(test_client, test_db):
+    """Test the status filter returns only matching orders with their status loaded"""
+    from app.models import User, Account, CSVData, OrderStatus
+
+    admin = test_db.query(User).filter(User.username == "admin").first()
+    account = Account(user_id=admin.id, platform_username="filter_seller", name="Filter Seller")
+    test_db.add(account)
+    test_db.flush()
+    shipped = CSVData(account_id=account.id, data_type="order", item_id="SHIP-1", csv_row={})
+    pending = CSVData(account_id=account.id, data_type="order", item_id="PEND-1", csv_row={})
+    no_status = CSVData(account_id=account.id, data_type="order", item_id="NONE-1", csv_row={})
+    test_db.add_all([shipped, pending, no_status])
+    test_db.flush()
+    test_db.add_all([
+        OrderStatus(csv_data_id=shipped.id, status="shipped", updated_by=admin.id),
+        OrderStatus(csv_data_id=pending.id, status="pending", updated_by=admin.id),
+    ])
+    test_db.commit()
+
+    login_response = test_client.post(
+        "/api/v1/login",
+        data={"username": "admin", "password": "admin123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    try:
+        response = test_client.get(f"/api/v1/orders?status=shipped&account_id={account.id}", headers=headers)
+        assert response.status_code == 200
+        orders = response.json()
+        assert [order["item_id"] for order in orders] == ["SHIP-1"]
+        assert orders[0]["order_status"]["status"] == "shipped"
+
+        response = test_client.get(f"/api/v1/orders?account_id={account.id}", headers=headers)
+        assert sorted(order["item_id"] for order in response.json()) == ["NONE-1", "PEND-1", "SHIP-1"]
+    finally:
+        test_db.query(OrderStatus).filter(
+            OrderStatus.csv_data_id.in_([shipped.id, pending.id])
+        ).delete(synchronize_session=False)
+        test_db.query(CSVData).filter(CSVData.account_id == account.id).delete(synchronize_session=False)
+        test_db.delete(account)
+        test_db.commit()
+
+
 def test_get_orders_unauthorized(test_client):
     """Test getting orders without authentication"""
     response = test_client.get("/api/v1/orders")
@@ -408,6 +451,76 @@ def test_global_search_success(test_client):
     assert isinstance(response.json(), list)
 
 
+def test_global_search_matches_csv_fields(test_client, test_db):
+    """Test global search filters csv_row fields in SQL and caps results at 20"""
+    from app.models import User, Account, CSVData
+
+    admin = test_db.query(User).filter(User.username == "admin").first()
+    account = Account(user_id=admin.id, platform_username="search_seller", name="Search Seller")
+    test_db.add(account)
+    test_db.flush()
+    rows = [
+        CSVData(account_id=account.id, data_type="order", item_id=f"ORD-{i}",
+                csv_row={"Order #": f"ZQX-{i}", "Customer": "Someone", "Item": "Widget"})
+        for i in range(25)
+    ]
+    rows.append(CSVData(account_id=account.id, data_type="listing", item_id="LST-1",
+                        csv_row={"Item #": "LST-1", "Title": "Vintage ZQ_LAMP", "Price": "$10"}))
+    rows.append(CSVData(account_id=account.id, data_type="listing", item_id="LST-2",
+                        csv_row={"Item #": "LST-2", "Title": "Vintage ZQXLAMP"}))
+    test_db.add_all(rows)
+    test_db.commit()
+
+    login_response = test_client.post(
+        "/api/v1/login",
+        data={"username": "admin", "password": "admin123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    try:
+        response = test_client.get("/api/v1/search?q=zqx-", headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) == 20
+        assert all(result["type"] == "order" for result in response.json())
+
+        # "_" is matched literally, not as a LIKE wildcard
+        response = test_client.get("/api/v1/search?q=zq_lamp", headers=headers)
+        assert [result["id"] for result in response.json()] == ["LST-1"]
+    finally:
+        test_db.query(CSVData).filter(CSVData.account_id == account.id).delete()
+        test_db.delete(account)
+        test_db.commit()
+
+
+def test_global_search_matches_non_ascii_case_insensitively(test_client, test_db):
+    """Test global search folds case for non-ASCII characters"""
+    from app.models import User, Account, CSVData
+
+    admin = test_db.query(User).filter(User.username == "admin").first()
+    account = Account(user_id=admin.id, platform_username="unicode_seller", name="Unicode Seller")
+    test_db.add(account)
+    test_db.flush()
+    test_db.add(CSVData(account_id=account.id, data_type="order", item_id="ORD-U1",
+                        csv_row={"Order #": "U-1", "Customer": "JOSÉ MÜLLER", "Item": "Widget"}))
+    test_db.commit()
+
+    login_response = test_client.post(
+        "/api/v1/login",
+        data={"username": "admin", "password": "admin123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    try:
+        for query in ("josé", "José Müller", "müller"):
+            response = test_client.get("/api/v1/search", params={"q": query}, headers=headers)
+            assert response.status_code == 200
+            assert [result["id"] for result in response.json()] == ["U-1"]
+    finally:
+        test_db.query(CSVData).filter(CSVData.account_id == account.id).delete()
+        test_db.delete(account)
+        test_db.commit()
+
+
 def test_global_search_short_query(test_client):
     """Test global search with query too short"""
     # Login as admin
@@ -458,6 +571,65 @@ def test_update_order_status_unauthorized(test_client):
     assert response.status_code == 401
 
 
+def test_update_order_status_checks_account_owner(test_client, test_db):
+    """Test staff can update orders on their own account but not on others"""
+    from app.models import User, Account, CSVData, OrderStatus
+    from app.auth import get_password_hash
+
+    admin = test_db.query(User).filter(User.username == "admin").first()
+    staff = User(username="status_staff", email="status_staff@example.com",
+                 password_hash=get_password_hash("staff123"), role="staff", is_active=True)
+    test_db.add(staff)
+    test_db.flush()
+    own_account = Account(user_id=staff.id, platform_username="staff_seller", name="Staff Seller")
+    other_account = Account(user_id=admin.id, platform_username="admin_seller", name="Admin Seller")
+    test_db.add_all([own_account, other_account])
+    test_db.flush()
+    own_order = CSVData(account_id=own_account.id, data_type="order", item_id="OWN-1",
+                        csv_row={"Order #": "OWN-1"})
+    other_order = CSVData(account_id=other_account.id, data_type="order", item_id="OTHER-1",
+                          csv_row={"Order #": "OTHER-1"})
+    test_db.add_all([own_order, other_order])
+    test_db.commit()
+
+    login_response = test_client.post(
+        "/api/v1/login",
+        data={"username": "status_staff", "password": "staff123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+    try:
+        response = test_client.put(f"/api/v1/orders/{own_order.id}/status",
+                                   json={"status": "shipped"}, headers=headers)
+        assert response.status_code == 200
+        test_db.expire_all()
+        assert test_db.query(OrderStatus).filter(OrderStatus.csv_data_id == own_order.id).one().status == "shipped"
+
+        # A second update changes the existing status row instead of adding one
+        response = test_client.put(f"/api/v1/orders/{own_order.id}/status",
+                                   json={"status": "completed"}, headers=headers)
+        assert response.status_code == 200
+        test_db.expire_all()
+        assert test_db.query(OrderStatus).filter(OrderStatus.csv_data_id == own_order.id).one().status == "completed"
+
+        response = test_client.put(f"/api/v1/orders/{other_order.id}/status",
+                                   json={"status": "shipped"}, headers=headers)
+        assert response.status_code == 403
+        assert test_db.query(OrderStatus).filter(OrderStatus.csv_data_id == other_order.id).count() == 0
+    finally:
+        test_db.query(OrderStatus).filter(
+            OrderStatus.csv_data_id.in_([own_order.id, other_order.id])
+        ).delete(synchronize_session=False)
+        test_db.query(CSVData).filter(
+            CSVData.account_id.in_([own_account.id, other_account.id])
+        ).delete(synchronize_session=False)
+        test_db.query(Account).filter(
+            Account.id.in_([own_account.id, other_account.id])
+        ).delete(synchronize_session=False)
+        test_db.delete(staff)
+        test_db.commit()
+
+
 def test_cors_headers_present(test_client):
     """Test that CORS headers are properly set"""
     response = test_client.options("/api/v1/login")
@@ -277,6 +277,26 @@ class TestDatabaseInitialization:
             if os.path.exists("test_schema.db"):
                 os.remove("test_schema.db")
 
+    def test_create_tables_skips_index_on_unmigrated_column(self):
+        """Test create_tables on a csv_data table that predates the transfer_id column"""
+        from sqlalchemy import inspect
+        from sqlalchemy.pool import StaticPool
+        from app.init_db import create_tables
+        
+        legacy_engine = create_engine("sqlite://", poolclass=StaticPool)
+        with legacy_engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE csv_data (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, "
+                "data_type VARCHAR NOT NULL, csv_row JSON NOT NULL, item_id VARCHAR)"
+            ))
+        
+        with patch('app.init_db.engine', legacy_engine):
+            create_tables()
+        
+        index_names = {index["name"] for index in inspect(legacy_engine).get_indexes("csv_data")}
+        assert "ix_csv_data_account_id_data_type_item_id" in index_names
+        assert "ix_csv_data_transfer_id" not in index_names
+
 
 class TestDatabaseConstraints:
     """Test database constraints and validations"""
@@ -161,10 +161,12 @@ class TestUniversalUploadService:
             if args[0] is Account:
                 return Mock(**{'filter.return_value.first.return_value': mock_account})
             else:
-                # For CSVData queries (existing record check)
-                return Mock(**{'filter.return_value.first.return_value': None})
+                # For CSVData queries (existing item IDs check)
+                return Mock(**{'filter.return_value.all.return_value': []})
         
         self.mock_db.query.side_effect = side_effect_query
+        # Bulk CSVData insert returns the new row IDs
+        self.mock_db.scalars.return_value.all.return_value = [1]
         
         # Setup CSV processor mocks
         mock_csv_processor.detect_platform_username.return_value = "test_user"
@@ -238,6 +240,51 @@ class TestUniversalUploadService:
         assert result.success is False
         assert "CSV processing errors" in result.message
 
+    def test_insert_records_creates_pending_order_statuses(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from app.database import Base
+
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            user = User(username="uploader", email="uploader@test.com", password_hash="x", role="admin")
+            db.add(user)
+            db.flush()
+            account = Account(user_id=user.id, platform_username="seller", name="Seller")
+            db.add(account)
+            db.flush()
+            db.add(CSVData(account_id=account.id, data_type="listing", csv_row={}, item_id="1"))
+            db.commit()
+
+            records = [(str(i), {"Order Number": str(i)}) for i in range(1, 1201)]
+            UniversalUploadService(db).insert_records(account.id, DataType.ORDER, records, user.id)
+            db.commit()
+
+            orders = db.query(CSVData).filter(CSVData.data_type == "order").all()
+            assert len(orders) == 1200
+            assert all(order.order_status.status == "pending" for order in orders)
+            assert all(order.order_status.updated_by == user.id for order in orders)
+            # The listing sharing item_id "1" does not get an order status
+            listing = db.query(CSVData).filter(CSVData.data_type == "listing").one()
+            assert listing.order_status is None
+
+            service = UniversalUploadService(db)
+            assert service.get_existing_item_ids(account.id, DataType.LISTING, ["1", "2"]) == {"1"}
+            uploaded_ids = [str(i) for i in range(1150, 1251)]
+            assert service.get_existing_item_ids(account.id, DataType.ORDER, uploaded_ids) == {
+                str(i) for i in range(1150, 1201)
+            }
+
+            # Rows inserted twice (e.g. concurrent uploads) still get one status each
+            service.insert_records(account.id, DataType.ORDER, records[:3], user.id)
+            db.commit()
+            assert db.query(OrderStatus).count() == 1203
+            assert db.query(OrderStatus.csv_data_id).distinct().count() == 1203
+        finally:
+            db.close()
+
 
 class TestEnhancedUploadService:
     """Test Enhanced Upload Service - SOLID Compliant"""
@@ -322,6 +369,14 @@ class TestEnhancedUploadService:
             mock_upload_id, False, 'File size exceeds 50MB limit'
         )
         
+    def test_exceeds_size_counts_utf8_bytes(self):
+        max_size = 10
+        assert EnhancedUploadService._exceeds_size("x" * 11, max_size) is True
+        assert EnhancedUploadService._exceeds_size("x" * 2, max_size) is False
+        # 4 chars but 12 bytes in UTF-8
+        assert EnhancedUploadService._exceeds_size("\u20ac" * 4, max_size) is True
+        assert EnhancedUploadService._exceeds_size("x" * 10, max_size) is False
+        
     @patch('app.services.enhanced_upload_service.progress_tracker')
     def test_upload_with_progress_upload_failure(self, mock_progress_tracker):
         mock_upload_id = str(uuid.uuid4())
@@ -483,10 +538,12 @@ class TestIntegrationEnhancedUpload:
             if args[0] is Account:
                 return Mock(**{'filter.return_value.first.return_value': mock_account})
             else:
-                # For CSVData queries (existing record check)
-                return Mock(**{'filter.return_value.first.return_value': None})
+                # For CSVData queries (existing item IDs check)
+                return Mock(**{'filter.return_value.all.return_value': []})
         
         mock_db.query.side_effect = side_effect_query
+        # Bulk CSVData insert returns the new row IDs
+        mock_db.scalars.return_value.all.return_value = [1]
         
         # Setup CSV processor mocks
         mock_csv_processor.detect_platform_username.return_value = "test_user"
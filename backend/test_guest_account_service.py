@@ -0,0 +1,270 @@
+"""
+GUEST Account Service Tests
+Covers data transfer to the GUEST account and permanent deletion of account data
+"""
+
+import json
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import User, Account, CSVData, OrderStatus, UserAccountPermission, AccountSettings, AccountTransfer
+from app.services import guest_account_service
+from app.services.guest_account_service import GuestAccountService
+from app.services.account_service import AccountService
+
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="function")
+def db():
+    """Fresh in-memory database with admin user for each test"""
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    session.add(User(
+        id=1,
+        username="admin",
+        email="admin@test.com",
+        password_hash="x",
+        role="admin"
+    ))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def source_account(db):
+    """Account with orders, a listing, a permission and a setting"""
+    account = Account(user_id=1, platform_username="seller1", name="Seller One", is_active=False)
+    db.add(account)
+    db.flush()
+    
+    orders = [
+        CSVData(account_id=account.id, data_type="order", csv_row={"Order #": "1"}, item_id="1"),
+        CSVData(account_id=account.id, data_type="order", csv_row={"Order #": "2"}, item_id="2",
+                account_context='{"source": "upload"}'),
+        CSVData(account_id=account.id, data_type="order", csv_row={"Order #": "3"}, item_id="3",
+                account_context="not json"),
+    ]
+    listing = CSVData(account_id=account.id, data_type="listing", csv_row={"Item #": "9"}, item_id="9")
+    db.add_all(orders + [listing])
+    db.flush()
+    
+    db.add(OrderStatus(csv_data_id=orders[0].id, status="pending", updated_by=1))
+    db.add(UserAccountPermission(user_id=1, account_id=account.id, permission_level="admin"))
+    db.add(AccountSettings(account_id=account.id, setting_key="k", setting_value="v"))
+    db.commit()
+    return account
+
+
+def test_transfer_account_data_moves_records_to_guest(db, source_account):
+    service = GuestAccountService(db)
+    source_id = source_account.id
+    
+    summary = service.transfer_account_data(source_account, target_user_id=1)
+    
+    guest = service.get_guest_account()
+    assert summary["guest_account_id"] == guest.id
+    assert summary["transferred_orders"] == 3
+    assert summary["transferred_listings"] == 1
+    assert summary["transferred_order_statuses"] == 1
+    assert summary["skipped_permissions"] == 1
+    assert summary["skipped_settings"] == 1
+    assert summary["transfer_timestamp"] is not None
+    
+    assert db.query(Account).filter(Account.id == source_id).first() is None
+    assert db.query(CSVData).filter(CSVData.account_id == source_id).count() == 0
+    assert db.query(UserAccountPermission).filter(UserAccountPermission.account_id == source_id).count() == 0
+    assert db.query(AccountSettings).filter(AccountSettings.account_id == source_id).count() == 0
+    
+    records = db.query(CSVData).filter(CSVData.account_id == guest.id).all()
+    assert len(records) == 4
+    for record in records:
+        assert record.transfer.original_account_id == source_id
+        assert record.transfer.original_account_name == "Seller One"
+        assert record.transfer.transferred_by == 1
+        assert record.transfer.transferred_at.isoformat() == summary["transfer_timestamp"]
+    
+    # Existing account context is left untouched
+    untouched = next(r for r in records if r.item_id == "2")
+    assert json.loads(untouched.account_context) == {"source": "upload"}
+
+
+def test_transfer_account_data_without_records_keeps_no_audit(db):
+    account = Account(user_id=1, platform_username="empty", name="Empty", is_active=False)
+    db.add(account)
+    db.commit()
+    
+    summary = GuestAccountService(db).transfer_account_data(account, target_user_id=1)
+    
+    assert summary["transferred_orders"] == 0
+    assert db.query(AccountTransfer).count() == 0
+
+
+def test_transfer_account_data_without_records_keeps_caller_changes(db):
+    account = Account(user_id=1, platform_username="empty", name="Empty", is_active=False)
+    db.add(account)
+    db.commit()
+    service = GuestAccountService(db)
+    service.get_guest_account_id()
+    pending = Account(user_id=1, platform_username="pending", name="Pending")
+    db.add(pending)
+    db.flush()
+    
+    service.transfer_account_data(account, target_user_id=1)
+    
+    # The empty transfer must not roll back work the caller has not committed yet
+    assert db.query(Account).filter(Account.platform_username == "pending").count() == 1
+
+
+def test_transfer_account_data_counts_only_own_order_statuses(db, source_account):
+    service = GuestAccountService(db)
+    service.transfer_account_data(source_account, target_user_id=1)
+    
+    second = Account(user_id=1, platform_username="seller2", name="Seller Two", is_active=False)
+    db.add(second)
+    db.flush()
+    order = CSVData(account_id=second.id, data_type="order", csv_row={"Order #": "5"}, item_id="5")
+    db.add(order)
+    db.flush()
+    db.add(OrderStatus(csv_data_id=order.id, status="shipped", updated_by=1))
+    db.commit()
+    
+    summary = service.transfer_account_data(second, target_user_id=1)
+    
+    assert summary["transferred_orders"] == 1
+    assert summary["transferred_order_statuses"] == 1
+
+
+def test_transfer_account_data_rejects_guest_source(db):
+    service = GuestAccountService(db)
+    guest = service.get_guest_account()
+    
+    with pytest.raises(ValueError, match="GUEST account to itself"):
+        service.transfer_account_data(guest, target_user_id=1)
+
+
+def test_transfer_account_data_rolls_back_on_failure(db, source_account, monkeypatch):
+    service = GuestAccountService(db)
+    source_id = source_account.id
+    
+    real_transfer = service._bulk_transfer_csv
+    
+    def transfer_then_fail(*args):
+        real_transfer(*args)
+        raise RuntimeError("transfer interrupted")
+    
+    monkeypatch.setattr(service, "_bulk_transfer_csv", transfer_then_fail)
+    
+    with pytest.raises(ValueError, match="Data transfer failed"):
+        service.transfer_account_data(source_account, target_user_id=1)
+    
+    assert db.query(Account).filter(Account.id == source_id).first() is not None
+    assert db.query(CSVData).filter(CSVData.account_id == source_id).count() == 4
+
+
+def test_guest_account_summary_lists_original_accounts(db, source_account):
+    service = GuestAccountService(db)
+    service.transfer_account_data(source_account, target_user_id=1)
+    
+    summary = service.get_guest_account_summary()
+    
+    assert summary["total_orders"] == 3
+    assert summary["total_listings"] == 1
+    assert summary["total_records"] == 4
+    assert summary["original_accounts"] == ["Seller One"]
+
+
+def test_guest_account_summary_includes_legacy_context_names(db):
+    service = GuestAccountService(db)
+    guest = service.get_guest_account()
+    db.add(CSVData(
+        account_id=guest.id, data_type="order", csv_row={"Order #": "7"}, item_id="7",
+        account_context=json.dumps({"original_account_id": 99, "original_account_name": "Old Seller"})
+    ))
+    db.add(CSVData(
+        account_id=guest.id, data_type="order", csv_row={"Order #": "8"}, item_id="8",
+        account_context="not json"
+    ))
+    db.commit()
+    
+    summary = service.get_guest_account_summary()
+    
+    assert summary["original_accounts"] == ["Old Seller"]
+
+
+def test_validate_account_deletion_reports_impact(db, source_account):
+    service = GuestAccountService(db)
+    
+    result = service.validate_account_deletion(source_account)
+    
+    assert result["can_delete"] is True
+    assert result["data_impact"] == {
+        "orders": 3,
+        "listings": 1,
+        "permissions": 1,
+        "settings": 1,
+        "total_records": 4
+    }
+
+
+def test_validate_account_deletion_rejects_guest(db):
+    service = GuestAccountService(db)
+    guest = service.get_guest_account()
+    
+    result = service.validate_account_deletion(guest)
+    
+    assert result["can_delete"] is False
+
+
+def test_get_guest_account_id_is_cached(db):
+    service = GuestAccountService(db)
+    guest_id = service.get_guest_account_id()
+    
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert service.get_guest_account_id() == guest_id
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert statements == []
+
+
+def test_permanent_delete_removes_all_account_data(db, source_account):
+    admin = db.query(User).filter(User.id == 1).first()
+    source_id = source_account.id
+    
+    result = AccountService(db).delete_account_with_options(source_id, admin, "delete")
+    
+    assert result["deletion_summary"]["deleted_orders"] == 3
+    assert result["deletion_summary"]["deleted_listings"] == 1
+    assert result["deletion_summary"]["deleted_order_statuses"] == 1
+    assert result["deletion_summary"]["deleted_permissions"] == 1
+    assert result["deletion_summary"]["deleted_settings"] == 1
+    assert db.query(Account).filter(Account.id == source_id).first() is None
+    assert db.query(CSVData).count() == 0
+    assert db.query(OrderStatus).count() == 0
+
+
+def test_lazy_guest_creation_failure_keeps_session_usable(db, monkeypatch):
+    service = GuestAccountService(db)
+    db.add(Account(user_id=1, platform_username="pending", name="Pending"))
+    db.flush()
+    monkeypatch.setattr(guest_account_service, "_GUEST_NAME", None)  # Rejected by NOT NULL on insert
+    
+    assert service.get_guest_account() is None
+    assert db.query(Account).filter(Account.platform_username == "pending").count() == 1